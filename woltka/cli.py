@@ -167,7 +167,8 @@ def cli():
     help='Write read-to-feature maps to this directory.')
 @click.option(
     '--zipmap', 'outmap_zip', default='gz',
-    type=click.Choice(['none', 'gz', 'bz2', 'xz'], case_sensitive=False),
+    type=click.Choice(['none', 'gz', 'bz2', 'xz', 'zst'],
+                      case_sensitive=False),
     help='Compress read-to-feature maps using this algorithm.')
 @click.option(
     '--outcov', 'outcov_dir', type=click.Path(dir_okay=True),
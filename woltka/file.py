@@ -11,10 +11,13 @@
 """Functions for handling input and output files.
 """
 
-from os.path import basename, dirname, splitext, isfile, join
+import os
+from os.path import basename, dirname, isfile, join
+from stat import S_ISREG
 from shutil import which
 from subprocess import Popen, PIPE
-import glob
+from io import TextIOWrapper
+from operator import itemgetter
 import gzip
 import bz2
 import lzma
@@ -24,8 +27,41 @@ from .util import count_list
 
 zipfmts = {'.gz':   'gzip', '.gzip':   'gzip',
            '.bz2': 'bzip2', '.bzip2': 'bzip2',
-           '.xz':     'xz', '.lz':       'xz', '.lzma': 'xz'}
+           '.xz':     'xz', '.lz':       'xz', '.lzma': 'xz',
+           '.zst':  'zstd'}
 ziplibs = {'gzip': gzip, 'bzip2': bz2, 'xz': lzma}
+zipexes = {'gzip': ('pigz', 'gzip'), 'bzip2': ('pbzip2', 'bzip2'),
+           'xz': ('xz',), 'zstd': ('zstd',)}
+
+# Zstandard module is optional (external program may be used instead)
+try:
+    import zstandard
+except ImportError:
+    pass
+else:
+    ziplibs['zstd'] = zstandard
+
+# faster modules for reading only, which override the above if available
+unziplibs = {}
+try:
+    from isal import igzip
+except ImportError:
+    pass
+else:
+    unziplibs['gzip'] = igzip
+
+
+class PipeReader(TextIOWrapper):
+    """Text stream of the output of an external program, which waits for
+    the program to exit when closed.
+    """
+    def __init__(self, args, bufsize=1048576):
+        self.proc = Popen(args, stdout=PIPE, bufsize=bufsize)
+        super().__init__(self.proc.stdout, encoding='utf-8')
+
+    def close(self):
+        super().close()
+        self.proc.wait()
 
 
 def openzip(fp, mode='rt'):
@@ -44,19 +80,38 @@ def openzip(fp, mode='rt'):
     file handle
         Text stream ready to be read.
 
+    Raises
+    ------
+    ValueError
+        Python module for the compression format is not installed.
+
     Notes
     -----
     This is a simple and universal solution which uses Python's built-in
     compression modules. It supports reading and writing. However it is not as
     fast as `readzip` in reading compressed files.
 
+    If python-isal is installed, its `igzip` module, which is a faster drop-in
+    replacement of `gzip`, will be used for reading gzip files. Writing still
+    uses `gzip`, such that the default compression level is kept.
+
+    Zstandard (".zst") files are supported only if python-zstandard is
+    installed.
+
     See Also
     --------
     readzip
     """
-    ext = splitext(fp)[1]
-    zipper = getattr(ziplibs[zipfmts[ext]], 'open') if ext in zipfmts else open
-    return zipper(fp, mode)
+    ext = fp[fp.rfind('.'):]
+    if ext not in zipfmts:
+        return open(fp, mode)
+    fmt = zipfmts[ext]
+    if fmt not in ziplibs:
+        raise ValueError(f'Python module for {fmt} compression is not '
+                         'installed.')
+    if 'r' in mode and fmt in unziplibs:
+        return unziplibs[fmt].open(fp, mode)
+    return ziplibs[fmt].open(fp, mode)
 
 
 def readzip(fp, zippers=None):
@@ -67,7 +122,7 @@ def readzip(fp, zippers=None):
     ----------
     fp : str
         Input filepath.
-    zippers : dict of bool, optional
+    zippers : dict of str, optional
         Available external compression programs.
 
     Returns
@@ -82,51 +137,88 @@ def readzip(fp, zippers=None):
     compression modules, because it saves the overhead in the Python wrapper,
     and utilizes additional thread(s) for decompression.
 
+    A regular file is read sequentially. Where supported, the kernel is advised
+    of this access pattern so that it reads ahead more aggressively.
+
     The function checks the availability of a certain compression program at
     its first use, and stores this information in the parameter `zippers` which
-    is shared across the program.
+    is shared across the program. Multi-threaded programs (`pigz` and `pbzip2`)
+    are preferred over their single-threaded counterparts if available.
 
     If the external compression program is not available, or disabled (when
-    `parameter` is not provided), the function will call Python's built-in
-    modules instead.
-
-    In addition to this method, a pure Python method for accelerating reading
-    compression files is to use the buffered reader:
-
-    >>> with gzip.open(fp, 'rb') as fh:
-    >>>     with io.BufferedReader(fh, 1048576) as buf:
-    >>>         for line in buf:
-    >>>             res = line.decode()
-    >>>             ...
+    `parameter` is not provided), the function will call `openzip` instead,
+    which reads the file through Python's built-in modules.
 
     See Also
     --------
     openzip
     """
-    # filename extension
-    ext = splitext(fp)[1]
+    # filename extension (only compression extensions matter)
+    ext = fp[fp.rfind('.'):]
 
     # not a compressed file
     if ext not in zipfmts:
-        return open(fp, 'r')
+        fh = open(fp, 'r')
+
+        # advise the kernel to read ahead aggressively (not applicable to
+        # pipes and other non-seekable inputs)
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        return fh
 
     fmt = zipfmts[ext]
 
     # external programs are disabled
     if zippers is None:
-        return ziplibs[fmt].open(fp, 'rt')
+        return openzip(fp)
 
     # check whether specific external program exists
     if fmt not in zippers:
-        zippers[fmt] = bool(which(fmt))
+        zippers[fmt] = next(filter(which, zipexes[fmt]), None)
 
     # use external program
     if zippers[fmt]:
-        return Popen([fmt, '-cdfq', fp], stdout=PIPE, encoding='utf-8').stdout
+        return PipeReader([zippers[fmt], '-cdfq', fp])
 
     # external program does not exist
     else:
-        return ziplibs[fmt].open(fp, 'rt')
+        return openzip(fp)
+
+
+def prefetch(fp):
+    """Advise the kernel to load a file into page cache in the background.
+
+    Parameters
+    ----------
+    fp : str
+        Input filepath.
+
+    Notes
+    -----
+    This lets the disk read a file that will be needed soon while the program
+    is busy with the current one. It is merely an advice: nothing will happen
+    if the platform does not support it, the file cannot be opened, or it is
+    not a regular file (e.g., a pipe).
+
+    The file is opened in non-blocking mode, such that a named pipe without a
+    writer will not stall the program.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(fp, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return
+    try:
+        if S_ISREG(os.fstat(fd).st_mode):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 
 def file2stem(fname, ext=None):
@@ -156,11 +248,17 @@ def file2stem(fname, ext=None):
         if not fname.endswith(ext):
             raise ValueError('Filepath and filename extension do not match.')
         return fname[:-len(ext)]
-    else:
-        stem, ext = splitext(fname)
-        if ext in zipfmts:
-            stem, ext = splitext(stem)
-        return stem
+
+    # strip compression extension (if any) and filename extension, while
+    # keeping leading dot(s) of hidden files, the same as `splitext`
+    lead = len(fname) - len(fname.lstrip('.'))
+    i = fname.rfind('.')
+    if i <= lead:
+        return fname
+    if fname[i:] in zipfmts:
+        j = fname.rfind('.', 0, i)
+        return fname[:j] if j > lead else fname[:i]
+    return fname[:i]
 
 
 def path2stem(fp, ext=None):
@@ -280,17 +378,20 @@ def id2file_from_dir(dir_, ext=None, ids=None):
     considered. Hidden files will be ignored.
     """
     res = {}
-    for fname in glob.glob(join(dir_, '*')):
-        if isfile(fname):
+    with os.scandir(dir_) as it:
+        for entry in it:
+            fname = entry.name
+            if fname.startswith('.') or not entry.is_file():
+                continue
             try:
-                id_ = path2stem(fname, ext)
+                id_ = file2stem(fname, ext)
             except ValueError:
                 continue
             if ids and id_ not in ids:
                 continue
             if id_ in res:
                 raise ValueError(f'Ambiguous files for ID: "{id_}".')
-            res[id_] = basename(fname)
+            res[id_] = fname
     return res
 
 
@@ -480,16 +581,21 @@ def write_readmap(fh, qryque, taxque, namedic=None):
     namedic : dict, optional
         Taxon name dictionary.
     """
-    # sort subjects by count (high-to-low) then by alphabet
-    def sortkey(x): return -x[1], x[0]
     is_name = bool(namedic)
+    write = fh.write
     for query, taxa in zip(qryque, taxque):
         if not taxa:
             continue
         row = [query]
         if isinstance(taxa, list):
-            for taxon, count in sorted(count_list(filter(None, taxa)).items(),
-                                       key=sortkey):
+
+            # sort subjects by count (high-to-low) then by alphabet, using two
+            # stable sorts with C-level keys
+            counts = count_list(filter(None, taxa)).items()
+            if len(counts) > 1:
+                counts = sorted(sorted(counts), key=itemgetter(1),
+                                reverse=True)
+            for taxon, count in counts:
                 if is_name and taxon in namedic:
                     taxon = namedic[taxon]
                 row.append(taxon + ':' + str(count))
@@ -497,4 +603,4 @@ def write_readmap(fh, qryque, taxque, namedic=None):
             row.append(namedic[taxa])
         else:
             row.append(taxa)
-        print('\t'.join(row), file=fh)
+        write('\t'.join(row) + '\n')
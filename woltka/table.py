@@ -11,13 +11,13 @@
 """Functions for manipulating tables (profiles).
 """
 
-from functools import reduce
+from functools import reduce, partial, lru_cache
 from itertools import accumulate
 from collections import defaultdict
 from operator import add
 from biom import Table, load_table
 
-from .util import allkeys, update_dict, round_list
+from .util import update_dict, round_list
 from .tree import lineage_str
 from .file import openzip
 from .biom import (
@@ -100,17 +100,31 @@ def prep_table(profile, samples=None, tree=None, rankdic=None, namedic=None,
     metacols = tuple(filter(None, (
         namecol and 'Name', rankdic and 'Rank', tree and 'Lineage')))
 
+    # fill cell values (feature counts) in a single pass over samples, while
+    # skipping zeros, such that features with all values being zero are
+    # never created
+    width = len(samples)
+    rows = {}
+    for i, sample in enumerate(samples):
+        for key, value in profile[sample].items():
+            if not value:
+                continue
+            try:
+                rows[key][i] = value
+            except KeyError:
+                row = rows[key] = [0] * width
+                row[i] = value
+
+    # cache lineage strings, as a taxon may appear in multiple strata
+    lineage = tree and lru_cache(maxsize=None)(partial(
+        lineage_str, tree=tree, namedic=namedic if name_as_id else None))
+
     notnone = None.__ne__
     features, data, metadata = [], [], []
 
     # sort features in alphabetical order
-    for key in sorted(allkeys(profile)):
-
-        # determine cell values (feature counts)
-        datum = [profile[x][key] if key in profile[x] else 0 for x in samples]
-        if not any(datum):
-            continue
-        data.append(datum)
+    for key in sorted(rows):
+        data.append(rows[key])
 
         # determine feature Id
         stratum, taxon = key if isinstance(key, tuple) else (None, key)
@@ -123,8 +137,7 @@ def prep_table(profile, samples=None, tree=None, rankdic=None, namedic=None,
         metadatum = dict(zip(metacols, filter(notnone, (
             namecol and (name or ''),
             rankdic and (rankdic[taxon] if taxon in rankdic else ''),
-            tree and lineage_str(
-                taxon, tree, namedic if name_as_id else None)))))
+            tree and lineage(taxon)))))
         metadata.append(metadatum)
 
     return data, features, samples, metadata
@@ -273,11 +286,14 @@ def write_tsv(table, fh):
     print(*header, sep='\t', file=fh)
 
     # table body
-    for i, feature in enumerate(features):
-        row = [feature, '\t'.join(map(str, data[i]))]
-        if metacols:
-            row.append('\t'.join(metadata[i].values()))
-        print(*row, sep='\t', file=fh)
+    write = fh.write
+    if metacols:
+        for feature, datum, metadatum in zip(features, data, metadata):
+            write(feature + '\t' + '\t'.join(map(str, datum)) + '\t' +
+                  '\t'.join(metadatum.values()) + '\n')
+    else:
+        for feature, datum in zip(features, data):
+            write(feature + '\t' + '\t'.join(map(str, datum)) + '\n')
 
 
 def strip_metacols(header, cols=['Name', 'Rank', 'Lineage']):
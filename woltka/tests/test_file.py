@@ -8,8 +8,8 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-from unittest import TestCase, main
-from os import remove, makedirs
+from unittest import TestCase, main, skipUnless
+from os import remove, makedirs, pipe, close, mkfifo
 from os.path import join, dirname, realpath
 from shutil import rmtree
 from tempfile import mkdtemp
@@ -17,9 +17,9 @@ import gzip
 import bz2
 
 from woltka.file import (
-    openzip, readzip, file2stem, path2stem, stem2rank, read_ids,
-    id2file_from_dir, id2file_from_map, read_map_uniq, read_map_1st,
-    read_map_all, read_map_many, write_readmap)
+    ziplibs, unziplibs, openzip, readzip, prefetch, file2stem, path2stem,
+    stem2rank, read_ids, id2file_from_dir, id2file_from_map, read_map_uniq,
+    read_map_1st, read_map_all, read_map_many, write_readmap)
 
 
 class FileTests(TestCase):
@@ -67,6 +67,61 @@ class FileTests(TestCase):
         self.assertEqual(obs, 'Here I am!')
         remove(fpb)
 
+    @skipUnless('zstd' in ziplibs, 'requires zstandard')
+    def test_openzip_zstd(self):
+        import zstandard
+
+        # write compressed file
+        fp = join(self.tmpdir, 'test.txt.zst')
+        with openzip(fp, 'wt') as f:
+            f.write('Hello World!\n')
+        with openzip(fp, 'at') as f:
+            f.write('Here I am!\n')
+        with zstandard.open(fp, 'rt') as f:
+            obs = f.read()
+        self.assertEqual(obs, 'Hello World!\nHere I am!\n')
+
+        # read compressed file
+        with openzip(fp) as f:
+            obs = f.read()
+        self.assertEqual(obs, 'Hello World!\nHere I am!\n')
+        with readzip(fp) as f:
+            obs = f.read()
+        self.assertEqual(obs, 'Hello World!\nHere I am!\n')
+        with readzip(fp, {}) as f:
+            obs = f.read()
+        self.assertEqual(obs, 'Hello World!\nHere I am!\n')
+        remove(fp)
+
+    @skipUnless('gzip' in unziplibs, 'requires isal')
+    def test_openzip_isal(self):
+        from isal import igzip
+
+        # write compressed file using gzip
+        fp = join(self.tmpdir, 'test.txt.gz')
+        with openzip(fp, 'wt') as f:
+            self.assertNotIsInstance(f.buffer, igzip.IGzipFile)
+            f.write('Hello World!')
+
+        # read compressed file using igzip
+        with openzip(fp) as f:
+            self.assertIsInstance(f.buffer, igzip.IGzipFile)
+            obs = f.read()
+        self.assertEqual(obs, 'Hello World!')
+        remove(fp)
+
+    def test_openzip_no_module(self):
+        fp = join(self.tmpdir, 'test.txt.zst')
+        lib = ziplibs.pop('zstd', None)
+        try:
+            with self.assertRaises(ValueError) as ctx:
+                openzip(fp, 'wt')
+            self.assertEqual(str(ctx.exception), (
+                'Python module for zstd compression is not installed.'))
+        finally:
+            if lib is not None:
+                ziplibs['zstd'] = lib
+
     def test_readzip(self):
         text = 'Hello World!'
 
@@ -91,7 +146,8 @@ class FileTests(TestCase):
         with readzip(fpz, zippers) as f:
             obs = f.read()
         self.assertEqual(obs, text)
-        self.assertDictEqual(zippers, {'gzip': True})
+        self.assertIn(zippers['gzip'], ('pigz', 'gzip'))
+        self.assertEqual(f.proc.returncode, 0)
 
         # read gzip file using already-identified gzip program
         with readzip(fpz, zippers) as f:
@@ -100,13 +156,44 @@ class FileTests(TestCase):
         self.assertTrue(zippers['gzip'])
 
         # disable gzip program
-        zippers['gzip'] = False
+        zippers['gzip'] = None
         with readzip(fpz, zippers) as f:
             obs = f.read()
         self.assertEqual(obs, text)
-        self.assertFalse(zippers['gzip'])
+        self.assertIsNone(zippers['gzip'])
         remove(fpz)
 
+        # read from a pipe (non-seekable)
+        r, w = pipe()
+        with open(w, 'w') as f:
+            f.write(text)
+        with readzip(f'/dev/fd/{r}') as f:
+            obs = f.read()
+        self.assertEqual(obs, text)
+        close(r)
+
+    def test_prefetch(self):
+        fp = join(self.tmpdir, 'test.txt')
+        with open(fp, 'w') as f:
+            f.write('Hello World!')
+        self.assertIsNone(prefetch(fp))
+        remove(fp)
+
+        # missing file is silently ignored
+        self.assertIsNone(prefetch(fp))
+
+        # pipe (non-seekable) is skipped
+        r, w = pipe()
+        self.assertIsNone(prefetch(f'/dev/fd/{r}'))
+        close(r)
+        close(w)
+
+        # named pipe without a writer does not block
+        fifo = join(self.tmpdir, 'fifo')
+        mkfifo(fifo)
+        self.assertIsNone(prefetch(fifo))
+        remove(fifo)
+
     def test_file2stem(self):
         self.assertEqual(file2stem('input.txt'), 'input')
         self.assertEqual(file2stem('input.gz'), 'input')
@@ -175,6 +262,12 @@ class FileTests(TestCase):
         obs = id2file_from_dir(self.tmpdir)
         self.assertDictEqual(obs, exp)
         rmtree(sdir)
+
+        # skip hidden files
+        open(join(self.tmpdir, '.hidden.faa'), 'a').close()
+        obs = id2file_from_dir(self.tmpdir)
+        self.assertDictEqual(obs, exp)
+        remove(join(self.tmpdir, '.hidden.faa'))
         for id_ in ids:
             remove(join(self.tmpdir, '{}.faa'.format(id_)))
 
@@ -415,6 +508,15 @@ class FileTests(TestCase):
         exp = ['R1\tG1', 'R2\tG2', 'R3\tG2:2\tG1:1', 'R4\tG3:3']
         self.assertListEqual(obs, exp)
 
+        # tied counts are sorted alphabetically
+        with open(fp, 'w') as f:
+            write_readmap(f, ['R1', 'R2'], [['G2', 'G1', 'G3', 'G3'],
+                                            ['G5', 'G4', 'G6']])
+        with open(fp, 'r') as f:
+            obs = f.read().splitlines()
+        exp = ['R1\tG3:2\tG1:1\tG2:1', 'R2\tG4:1\tG5:1\tG6:1']
+        self.assertListEqual(obs, exp)
+
         # with name dict
         namedic = {'G1': 'Ecoli', 'G2': 'Strep', 'G3': 'Kleb'}
         with open(fp, 'w') as f:
@@ -143,6 +143,11 @@ class TableTests(TestCase):
             'A|G1', 'A|G2', 'B|G1', 'B|G2', 'B|G3', 'C|G2'])
         self.assertListEqual(obs[2], ['S1', 'S2', 'S3'])
 
+        # with stratification and lineages
+        obs = prep_table(sprof, tree=tree)
+        self.assertListEqual([x['Lineage'] for x in obs[3]], [
+            '2;72;74', '2;72', '2;72;74', '2;72', '2;70', '2;72'])
+
         # empty parameters instead of None
         obs = prep_table(prof, None, {}, {}, {})
         self.assertListEqual(obs[3], [{}] * 5)
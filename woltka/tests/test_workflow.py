@@ -19,11 +19,14 @@ from io import StringIO
 import pandas as pd
 from biom import load_table
 from pandas.testing import assert_frame_equal
+from click import UsageError
 
+from woltka.file import ziplibs
 from woltka.workflow import (
-    workflow, classify, parse_samples, parse_strata, build_mapper, parse_sizes,
-    prepare_ranks, build_hierarchy, assign_readmap, strip_suffix, demultiplex,
-    read_strata, frac_profiles, scale_profiles, round_profiles, write_profiles)
+    workflow, check_outzip, classify, parse_samples, parse_strata,
+    build_mapper, parse_sizes, prepare_ranks, build_hierarchy, assign_readmap,
+    strip_suffix, demultiplex, read_strata, frac_profiles, scale_profiles,
+    round_profiles, write_profiles)
 
 
 class WorkflowTests(TestCase):
@@ -46,6 +49,35 @@ class WorkflowTests(TestCase):
             self.datdir, 'output', 'bowtie2.ogu.tsv')))
         remove(output_fp)
 
+    def test_check_outzip(self):
+        # supported formats
+        self.assertIsNone(check_outzip('out.tsv'))
+        self.assertIsNone(check_outzip('out.tsv.gz', 'outmap', 'bz2'))
+        self.assertIsNone(check_outzip('outdir', 'outmap', 'none'))
+
+        # Python module is not installed
+        msg = ('Writing zstd-compressed files requires a Python module that '
+               'is not installed.')
+        with patch.dict(ziplibs):
+            ziplibs.pop('zstd', None)
+            with self.assertRaises(UsageError) as ctx:
+                check_outzip('out.tsv.zst')
+            self.assertEqual(str(ctx.exception), msg)
+            with self.assertRaises(UsageError) as ctx:
+                check_outzip('out.tsv', 'outmap', 'zst')
+            self.assertEqual(str(ctx.exception), msg)
+
+            # read maps are not written
+            self.assertIsNone(check_outzip('out.tsv', None, 'zst'))
+
+            # checked before classification
+            input_fp = join(self.datdir, 'align', 'bowtie2')
+            output_fp = join(self.tmpdir, 'tmp.tsv.zst')
+            with patch('woltka.workflow.classify') as mock:
+                with self.assertRaises(UsageError):
+                    workflow(input_fp, output_fp)
+                mock.assert_not_called()
+
     def test_coverage(self):
         # simplest ogu workflow
         input_fp = join(self.datdir, 'align', 'bowtie2')
@@ -26,8 +26,9 @@ import click
 from .util import (
     update_dict, allkeys, sum_dict, scale_factor, scale_dict, round_dict)
 from .file import (
-    openzip, readzip, path2stem, stem2rank, read_ids, id2file_from_dir,
-    id2file_from_map, read_map_uniq, read_map_1st, write_readmap)
+    zipfmts, ziplibs, openzip, readzip, prefetch, path2stem, stem2rank,
+    read_ids, id2file_from_dir, id2file_from_map, read_map_uniq, read_map_1st,
+    write_readmap)
 from .align import plain_mapper, range_mapper
 from .classify import (
     assign_none, assign_free, assign_rank, counter, counter_size,
@@ -104,6 +105,9 @@ def workflow(input_fp:     str,
     .cli.classify
         Command-line arguments and help information.
     """
+    # check output compression formats
+    check_outzip(output_fp, outmap_dir, outmap_zip)
+
     # available external compressors
     zippers = None if no_exe else {}
 
@@ -154,6 +158,41 @@ def workflow(input_fp:     str,
     return data
 
 
+def check_outzip(output_fp:  str,
+                 outmap_dir: str = None,
+                 outmap_zip: str = None):
+    """Check if output files can be compressed in requested formats.
+
+    Parameters
+    ----------
+    output_fp : str
+        Path to output profile file or directory.
+    outmap_dir : str, optional
+        Path to output read map directory.
+    outmap_zip : str, optional
+        Compression format of output read maps.
+
+    Raises
+    ------
+    click.UsageError
+        Python module for compression format is not installed.
+
+    Notes
+    -----
+    This check is performed before classification, such that the program
+    will not fail after a lengthy classification process.
+    """
+    exts = [output_fp[output_fp.rfind('.'):]]
+    if outmap_dir and outmap_zip and outmap_zip != 'none':
+        exts.append(f'.{outmap_zip}')
+    for ext in exts:
+        fmt = zipfmts.get(ext)
+        if fmt and fmt not in ziplibs:
+            raise click.UsageError(
+                f'Writing {fmt}-compressed files requires a Python module '
+                'that is not installed.')
+
+
 def classify(mapper:  object,
              files:     list or dict,
              samples:   list = None,
@@ -273,7 +312,12 @@ def classify(mapper:  object,
     csample = False
 
     # parse input alignment file(s) and generate profile(s)
-    for fp in sorted(files):
+    fps = sorted(files)
+    for i, fp in enumerate(fps):
+
+        # let the next file be loaded while the current one is being parsed
+        if i + 1 < len(fps) and fps[i + 1] != '-':
+            prefetch(fps[i + 1])
 
         # decide input type (stdin or file)
         if fp == '-':